@@ -1,6 +1,9 @@
 import re
 import sys
 
+HEADER_NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)*\.?)\s+(.*)$')
+
+
 def adjust_markdown_headers(input_file, output_file=None):
     """
     调整Markdown文件中的一级标题
@@ -27,7 +30,8 @@ def adjust_markdown_headers(input_file, output_file=None):
             
             # 检查是否以数字开头（带编号）
             # 匹配模式：数字.数字.数字... 或单独的数字，末尾可带点
-            number_match = re.match(r'^(\d+(?:\.\d+)*\.?)\s+(.*)$', content)
+            # 首字符不是数字时无需再跑正则
+            number_match = HEADER_NUMBER_RE.match(content) if content[:1].isdigit() else None
             
             if number_match:
                 # 带编号的标题
@@ -1,9 +1,11 @@
 import re
 import sys
 import os
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 HEADER_NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)*\.?)\s+(.*)$')
+# 以换行符为字面前缀，正则引擎可直接快速查找，比 MULTILINE 的 ^ 逐位置尝试快得多
+LEVEL1_HEADER_RE = re.compile(rb'\n(# [^\n]*)')
 
 
 def transform_line(line: str) -> str:
@@ -12,6 +14,10 @@ def transform_line(line: str) -> str:
         return line
 
     content = line[2:].strip()
+    # 带编号的标题必以数字开头，先做首字符判断，避免对普通标题跑正则
+    if not content[:1].isdigit():
+        return f"**{content}**\n"
+
     number_match = HEADER_NUMBER_RE.match(content)
 
     if number_match:
@@ -24,6 +30,17 @@ def transform_line(line: str) -> str:
     return f"**{content}**\n"
 
 
+def iter_level1_header_spans(content: bytes) -> Iterator[Tuple[int, int]]:
+    """逐个给出一级标题行的(起始, 结束)偏移，结束位置含行尾换行符。"""
+    if content.startswith(b'# '):
+        end = content.find(b'\n')
+        yield 0, len(content) if end < 0 else end + 1
+
+    for match in LEVEL1_HEADER_RE.finditer(content):
+        end = match.end(1)
+        yield match.start(1), min(end + 1, len(content))
+
+
 def adjust_markdown_headers(input_file: str, output_file: Optional[str] = None) -> None:
     """
     调整Markdown文件中的一级标题
@@ -37,21 +54,31 @@ def adjust_markdown_headers(input_file: str, output_file: Optional[str] = None)
         output_file: 输出文件路径（如果为None，则自动生成为“输入文件名_head”）
     """
     
-    with open(input_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    with open(input_file, 'rb') as f:
+        content = f.read()
 
-    processed_lines = [transform_line(line) for line in lines]
-    
     # 写入文件
     if output_file is None:
         input_dir = os.path.dirname(input_file)
         input_name = os.path.basename(input_file)
         stem, ext = os.path.splitext(input_name)
         output_file = os.path.join(input_dir, f"{stem}_head{ext}")
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.writelines(processed_lines)
-    
+
+    # 只有一级标题行需要完整 Unicode 语义（strip、\d）；其余内容按原始字节切片直接写出
+    view = memoryview(content)
+    pos = 0
+    with open(output_file, 'wb') as f:
+        for start, end in iter_level1_header_spans(content):
+            f.write(view[pos:start])
+            line = content[start:end]
+            new_line = transform_line(line.decode('utf-8')).encode('utf-8')
+            # 改写后的标题行沿用原行的换行符，避免 CRLF 文件出现混合换行
+            if line.endswith(b'\r\n'):
+                new_line = new_line[:-1] + b'\r\n'
+            f.write(new_line)
+            pos = end
+        f.write(view[pos:])
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         sys.exit(1)
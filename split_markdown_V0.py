@@ -7,6 +7,10 @@ def get_file_size_kb(file_path):
     """获取文件大小（KB）"""
     return os.path.getsize(file_path) / 1024
 
+def get_text_size_kb(text):
+    """计算文本大小（KB），避免临时文件"""
+    return len(text.encode('utf-8')) / 1024
+
 def split_by_headers(content, header_level):
     """按指定级别的标题切分内容"""
     if header_level == 1:
@@ -45,7 +49,8 @@ def save_chunks(chunks, output_dir, base_name):
         with open(filepath, 'w', encoding='utf-8') as f:
             f.write(chunk)
         
-        size_kb = get_file_size_kb(filepath)
+        # 大小直接由内容计算，无需写后再 stat
+        size_kb = get_text_size_kb(chunk)
         saved_files.append((filepath, size_kb))
         print(f"已保存: {filename} ({size_kb:.2f} KB)")
     
@@ -90,13 +95,8 @@ def split_markdown_document(file_path, source_language='en', max_size_kb=30):
     need_further_split = False
     
     for i, chunk in enumerate(chunks_level1, 1):
-        # 临时保存以检查大小
-        temp_file = f"temp_chunk_{i}.md"
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            f.write(chunk)
-        
-        chunk_size = get_file_size_kb(temp_file)
-        os.remove(temp_file)
+        # 直接按 UTF-8 字节数计算大小
+        chunk_size = get_text_size_kb(chunk)
         
         if chunk_size > max_size_kb:
             print(f"  部分 {i} ({chunk_size:.2f} KB) 仍然过大，需要按二级标题切分")
@@ -122,11 +122,10 @@ def split_markdown_document(file_path, source_language='en', max_size_kb=30):
     print(f"输出目录: {output_dir}")
     
     # 检查是否还有超大文件
-    oversized = [f for f, size in saved_files if size > max_size_kb]
+    oversized = [(f, size) for f, size in saved_files if size > max_size_kb]
     if oversized:
         print(f"\n⚠️ 警告: 以下 {len(oversized)} 个文件仍然超过 {max_size_kb} KB:")
-        for filepath in oversized:
-            size = get_file_size_kb(filepath)
+        for filepath, size in oversized:
             print(f"  - {os.path.basename(filepath)}: {size:.2f} KB")
         print("建议手动检查这些文件是否需要进一步处理")
     
@@ -1,171 +1,280 @@
 import argparse
+import json
+import mmap
 import os
 import re
-from typing import List, Optional, Tuple
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 DEFAULT_MAX_CHUNK_KB = 30
 DEFAULT_MIN_CHUNK_KB = 10
 DEFAULT_MAX_HEADER_LEVEL = 6
-
-_HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*$')
-_FENCE_MARK_RE = re.compile(r'^[ \t]{0,3}([`~]{3,})[ \t]*.*$')
-_OUTPUT_FILE_RE_TEMPLATE = r'^\d+_{base}\.md$'
-
-
-def get_file_size_kb(file_path: str) -> float:
-    """获取文件大小（KB）"""
-    return os.path.getsize(file_path) / 1024
-
-
-def get_text_size_kb(text: str) -> float:
-    """计算文本大小（KB），避免临时文件"""
-    return len(text.encode('utf-8')) / 1024
-
-
-def _parse_fence_marker(line: str) -> Optional[Tuple[str, int]]:
-    """解析围栏标记，返回(符号字符, 连续长度)。"""
-    match = _FENCE_MARK_RE.match(line.rstrip('\n\r'))
-    if not match:
-        return None
-    marker = match.group(1)
-    return marker[0], len(marker)
-
-
-def split_by_header_level(content: str, header_level: int) -> List[str]:
+# 超过该大小的源文件用 mmap 映射，直接在页缓存上扫描
+MMAP_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+# 扫描函数既接受 bytes 也接受 mmap；切片结果始终为 bytes
+_Buffer = Union[bytes, mmap.mmap]
+
+# 单次扫描同时识别 ATX 标题行（group 1 为 #）与围栏行（group 2 为围栏起始的三个相同符号）
+_LINE_PATTERN = rb'(?:(#{1,6})[ \t]+(?=[^\r\n])|[ \t]{0,3}(```|~~~))'
+_FIRST_LINE_RE = re.compile(_LINE_PATTERN)
+# 以换行符为字面前缀，并先检查行首字符：正文行一次字符比较即被跳过，无需在每个位置尝试匹配
+_SCANNER = re.compile(rb'\n(?=[#`~ \t])' + _LINE_PATTERN)
+# str.splitlines 认可的其余单字节行分隔符；仅当文本中确实出现时才改用较慢的完整扫描。
+# U+0085、U+2028、U+2029 不作为行分隔符（多字节查找会使扫描成本成倍增加）
+_EXTRA_LINE_BREAKS = (b'\f', b'\v', b'\x1c', b'\x1d', b'\x1e')
+_BARE_CR_RE = re.compile(rb'\r(?!\n)')
+_ANY_BREAK_SCANNER = re.compile(rb'[\n\r\f\v\x1c-\x1e](?=[#`~ \t])' + _LINE_PATTERN)
+# 与 str.isspace() 相同的空白字符集（UTF-8 编码），用于判定前言是否全为空白而无需解码
+_BLANK_RE = re.compile(
+    rb'(?:[\t\n\v\f\r\x1c-\x1f ]|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]'
+    rb'|\xe2\x81\x9f|\xe3\x80\x80)*'
+)
+_SPLIT_CACHE_NAME = '.split_cache'
+
+
+def get_text_size_kb(text: _Buffer) -> float:
+    """计算文本大小（KB）；全程按 UTF-8 字节处理，无需重复编码"""
+    return len(text) / 1024
+
+
+def _parse_fence_marker(content: _Buffer, pos: int) -> Tuple[int, int]:
+    """从围栏起始位置统计连续相同符号，返回(符号字节, 连续长度)。"""
+    mark_char = content[pos]
+    end = pos + 1
+    size = len(content)
+    while end < size and content[end] == mark_char:
+        end += 1
+    return mark_char, end - pos
+
+
+def _scan_headings(content: _Buffer) -> Dict[int, List[int]]:
     """
-    按指定标题级别切分。
-    仅匹配严格 ATX 标题（行首 #，且 # 后至少一个空白），并忽略代码块内内容。
+    单次扫描全文，按级别汇总代码块外所有 ATX 标题的偏移（各列表有序）。
+    仅匹配严格 ATX 标题（行首 #，且 # 后至少一个空白）。
     """
-    if not 1 <= header_level <= 6:
-        return [content]
-
-    lines = content.splitlines(keepends=True)
-    heading_indexes: List[int] = []
+    level_offsets: Dict[int, List[int]] = {}
     in_fence = False
-    fence_char = ''
+    fence_char = 0
     fence_len = 0
 
-    for idx, line in enumerate(lines):
-        fence = _parse_fence_marker(line)
-        if fence:
-            mark_char, mark_len = fence
+    scanner = _SCANNER
+    if _BARE_CR_RE.search(content) or any(content.find(sep) >= 0 for sep in _EXTRA_LINE_BREAKS):
+        scanner = _ANY_BREAK_SCANNER
+
+    matches: Iterable[re.Match[bytes]] = scanner.finditer(content)
+    first_line = _FIRST_LINE_RE.match(content)
+    if first_line:
+        matches = chain((first_line,), matches)
+
+    for match in matches:
+        if match.start(2) >= 0:
+            mark_char, mark_len = _parse_fence_marker(content, match.start(2))
             if not in_fence:
                 in_fence = True
                 fence_char = mark_char
                 fence_len = mark_len
-                continue
-            if mark_char == fence_char and mark_len >= fence_len:
+            elif mark_char == fence_char and mark_len >= fence_len:
                 in_fence = False
-                fence_char = ''
+                fence_char = 0
                 fence_len = 0
-                continue
-
-        if in_fence:
             continue
 
-        match = _HEADING_RE.match(line.rstrip('\n\r'))
-        if not match:
-            continue
+        if not in_fence:
+            start, end = match.span(1)
+            level_offsets.setdefault(end - start, []).append(start)
 
-        if len(match.group(1)) == header_level:
-            heading_indexes.append(idx)
+    return level_offsets
 
-    if not heading_indexes:
-        return [content]
 
-    chunks: List[str] = []
+def _split_range(content: _Buffer, offsets: List[int], start: int, end: int) -> List[Tuple[int, int]]:
+    """在 content[start:end] 内按给定标题偏移切分，返回子区间；空白前言会被丢弃。"""
+    lo = bisect_left(offsets, start)
+    hi = bisect_left(offsets, end, lo)
+    if lo == hi:
+        return [(start, end)]
+
+    cut_points = offsets[lo:hi]
+    ranges: List[Tuple[int, int]] = []
+    # 前言按 str.strip() 判空，U+3000、NBSP 等 Unicode 空白同样视为空白；遇到首个非空白字符即停止
+    if cut_points[0] > start and not _BLANK_RE.fullmatch(content, start, cut_points[0]):
+        ranges.append((start, cut_points[0]))
 
-    if heading_indexes[0] > 0:
-        intro = ''.join(lines[: heading_indexes[0]])
-        if intro.strip():
-            chunks.append(intro)
+    cut_points.append(end)
+    ranges.extend(zip(cut_points, cut_points[1:]))
+    return ranges
 
-    for i, start in enumerate(heading_indexes):
-        end = heading_indexes[i + 1] if i + 1 < len(heading_indexes) else len(lines)
-        chunk = ''.join(lines[start:end])
-        if chunk.strip():
-            chunks.append(chunk)
 
-    return chunks
+def split_by_header_level(content: bytes, header_level: int) -> List[bytes]:
+    """
+    按指定标题级别切分。
+    仅匹配严格 ATX 标题（行首 #，且 # 后至少一个空白），并忽略代码块内内容。
+    """
+    if not 1 <= header_level <= 6:
+        return [content]
+
+    offsets = _scan_headings(content).get(header_level, [])
+    return [content[a:b] for a, b in _split_range(content, offsets, 0, len(content))]
 
 
 def split_chunk_recursive(
-    chunk: str,
+    chunk: _Buffer,
     current_level: int,
     max_level: int,
     max_size_kb: float,
-) -> List[str]:
-    """递归按标题层级切分，直到达到大小限制或无更细粒度标题。"""
-    if get_text_size_kb(chunk) <= max_size_kb:
-        return [chunk]
-
-    if current_level > max_level:
-        return [chunk]
+) -> List[bytes]:
+    """
+    按标题层级逐级切分，直到达到大小限制或无更细粒度标题。
+    标题位置只扫描一次，之后仅在偏移区间上用栈展开，最后统一切片。
+    """
+    # 未超限或全文没有任何 #（纯正文/代码）时无需扫描
+    if get_text_size_kb(chunk) <= max_size_kb or chunk.find(b'#') < 0:
+        return [chunk[:]]
+
+    level_offsets = _scan_headings(chunk)
+    ranges: List[Tuple[int, int]] = []
+    stack: List[Tuple[int, int, int]] = [(0, len(chunk), current_level)]
+
+    while stack:
+        start, end, level = stack.pop()
+        if (end - start) / 1024 <= max_size_kb:
+            ranges.append((start, end))
+            continue
 
-    parts = split_by_header_level(chunk, current_level)
-    if len(parts) <= 1:
-        return split_chunk_recursive(chunk, current_level + 1, max_level, max_size_kb)
+        # 直接查各级别的标题偏移，取第一个能把区间切成多块的级别
+        parts: List[Tuple[int, int]] = []
+        while level <= max_level:
+            offsets = level_offsets.get(level)
+            level += 1
+            if offsets:
+                parts = _split_range(chunk, offsets, start, end)
+                if len(parts) > 1:
+                    break
+
+        if len(parts) > 1:
+            stack.extend((a, b, level) for a, b in reversed(parts))
+        else:
+            ranges.append((start, end))
 
-    result: List[str] = []
-    for part in parts:
-        result.extend(split_chunk_recursive(part, current_level + 1, max_level, max_size_kb))
-    return result
+    return [chunk[a:b] for a, b in ranges]
 
 
-def merge_small_chunks(chunks: List[str], min_size_kb: float, max_size_kb: float) -> List[str]:
+def merge_small_chunks(chunks: List[bytes], min_size_kb: float, max_size_kb: float) -> List[bytes]:
     """自动合并过小分块；若合并后超过上限则不合并。"""
     if not chunks:
         return []
 
-    merged: List[str] = []
-    current = chunks[0]
+    merged: List[bytes] = []
+    # 当前分块以片段列表累积，刷新时一次性 join，避免反复拼接整串
+    current: List[bytes] = [chunks[0]]
+    current_bytes = len(chunks[0])
 
     for next_chunk in chunks[1:]:
-        current_size = get_text_size_kb(current)
-        next_size = get_text_size_kb(next_chunk)
-        combined = current + ('\n' if not current.endswith('\n') else '') + next_chunk
-        combined_size = get_text_size_kb(combined)
-
-        should_try_merge = current_size < min_size_kb or next_size < min_size_kb
-        if should_try_merge and combined_size <= max_size_kb:
-            current = combined
+        next_bytes = len(next_chunk)
+        separator = b'' if current[-1].endswith(b'\n') else b'\n'
+        combined_bytes = current_bytes + len(separator) + next_bytes
+
+        should_try_merge = current_bytes / 1024 < min_size_kb or next_bytes / 1024 < min_size_kb
+        if should_try_merge and combined_bytes / 1024 <= max_size_kb:
+            if separator:
+                current.append(separator)
+            current.append(next_chunk)
+            current_bytes = combined_bytes
         else:
-            merged.append(current)
-            current = next_chunk
+            merged.append(b''.join(current))
+            current = [next_chunk]
+            current_bytes = next_bytes
 
-    merged.append(current)
+    merged.append(b''.join(current))
     return merged
 
 
 def _cleanup_existing_chunk_files(output_dir: str, base_name: str) -> None:
-    """清理旧分块文件，避免重复运行时残留。"""
-    if not os.path.isdir(output_dir):
-        return
-
-    file_re = re.compile(_OUTPUT_FILE_RE_TEMPLATE.format(base=re.escape(base_name)))
-    for name in os.listdir(output_dir):
-        if file_re.match(name):
-            path = os.path.join(output_dir, name)
-            if os.path.isfile(path):
-                os.remove(path)
-
-
-def save_chunks(chunks: List[str], output_dir: str, base_name: str) -> List[str]:
+    """清理旧分块文件，避免重复运行时残留；调用方需确保 output_dir 已存在。"""
+    # 分块文件名形如 NN_{base_name}.md；scandir 的目录项自带文件类型，无需逐个 stat
+    suffix = f"_{base_name}.md"
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.endswith(suffix) and name[: -len(suffix)].isdecimal() and entry.is_file():
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+def save_chunks(chunks: List[bytes], output_dir: str, base_name: str) -> List[str]:
     """保存切分后的文件"""
-    os.makedirs(output_dir, exist_ok=True)
-    _cleanup_existing_chunk_files(output_dir, base_name)
-
-    saved_files: List[str] = []
-    for i, chunk in enumerate(chunks, 1):
-        filename = f"{i:02d}_{base_name}.md"
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
+    if os.path.isdir(output_dir):
+        _cleanup_existing_chunk_files(output_dir, base_name)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+
+    saved_files = _chunk_file_paths(output_dir, base_name, len(chunks))
+    for filepath, chunk in zip(saved_files, chunks):
+        # 分块已是 UTF-8 字节，二进制写入即一次 write，无文本层编码
+        with open(filepath, 'wb') as f:
             f.write(chunk)
-        saved_files.append(filepath)
 
     return saved_files
 
 
+def _chunk_file_paths(output_dir: str, base_name: str, count: int) -> List[str]:
+    return [os.path.join(output_dir, f"{i:02d}_{base_name}.md") for i in range(1, count + 1)]
+
+
+def _split_cache_key(
+    file_path: str,
+    max_size_kb: float,
+    min_size_kb: float,
+    max_header_level: int,
+) -> List[object]:
+    """以源文件状态与切分参数作为缓存键。"""
+    stat = os.stat(file_path)
+    return [os.path.basename(file_path), stat.st_mtime_ns, stat.st_size, max_size_kb, min_size_kb, max_header_level]
+
+
+def _is_split_cache_valid(output_dir: str, base_name: str, cache_key: List[object]) -> bool:
+    """
+    判断上次切分结果是否仍然有效：缓存键一致且各分块文件存在、大小未变。
+    缓存失效时删除缓存文件。
+    """
+    cache_path = os.path.join(output_dir, _SPLIT_CACHE_NAME)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if isinstance(cache, dict) and cache.get('key') == cache_key and isinstance(cache.get('chunk_sizes'), list):
+        chunk_sizes = cache['chunk_sizes']
+        paths = _chunk_file_paths(output_dir, base_name, len(chunk_sizes))
+        try:
+            if all(os.path.getsize(path) == size for path, size in zip(paths, chunk_sizes)):
+                return True
+        except OSError:
+            pass
+
+    _remove_split_cache(output_dir)
+    return False
+
+
+def _save_split_cache(output_dir: str, cache_key: List[object], chunks: List[bytes]) -> None:
+    cache_path = os.path.join(output_dir, _SPLIT_CACHE_NAME)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'key': cache_key, 'chunk_sizes': [len(chunk) for chunk in chunks]}, f)
+
+
+def _remove_split_cache(output_dir: str) -> None:
+    try:
+        os.remove(os.path.join(output_dir, _SPLIT_CACHE_NAME))
+    except FileNotFoundError:
+        pass
+
+
 def _validate_params(max_size_kb: float, min_size_kb: float, max_header_level: int) -> None:
     if max_size_kb <= 0:
         raise ValueError('max_size_kb must be > 0')
@@ -177,6 +286,13 @@ def _validate_params(max_size_kb: float, min_size_kb: float, max_header_level: i
         raise ValueError('max_header_level must be between 1 and 6')
 
 
+def _output_dir_for(file_path: str) -> str:
+    """分块输出目录：源文件同级的 {文件名}_split。"""
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    work_dir = os.path.dirname(file_path) or '.'
+    return os.path.join(work_dir, f"{base_name}_split")
+
+
 def split_markdown_document(
     file_path: str,
     max_size_kb: float = DEFAULT_MAX_CHUNK_KB,
@@ -194,44 +310,121 @@ def split_markdown_document(
     """
     _validate_params(max_size_kb=max_size_kb, min_size_kb=min_size_kb, max_header_level=max_header_level)
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
     base_name = os.path.splitext(os.path.basename(file_path))[0]
-    work_dir = os.path.dirname(file_path) or '.'
-    output_dir = os.path.join(work_dir, f"{base_name}_split")
+    output_dir = _output_dir_for(file_path)
 
-    if get_file_size_kb(file_path) <= max_size_kb:
-        save_chunks([content], output_dir, base_name)
+    # 源文件与参数未变且分块文件完好时直接复用上次结果
+    cache_key = _split_cache_key(file_path, max_size_kb, min_size_kb, max_header_level)
+    if _is_split_cache_valid(output_dir, base_name, cache_key):
         return output_dir
 
-    initial_chunks = split_chunk_recursive(
-        chunk=content,
-        current_level=1,
-        max_level=max_header_level,
-        max_size_kb=max_size_kb,
-    )
+    content: _Buffer
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD_BYTES:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            content = f.read()
+
+    try:
+        if get_text_size_kb(content) <= max_size_kb:
+            # 整块切片：bytes 返回自身，mmap 则复制出 bytes 供关闭映射后写出
+            final_chunks = [content[:]]
+        else:
+            initial_chunks = split_chunk_recursive(
+                chunk=content,
+                current_level=1,
+                max_level=max_header_level,
+                max_size_kb=max_size_kb,
+            )
+            final_chunks = merge_small_chunks(initial_chunks, min_size_kb=min_size_kb, max_size_kb=max_size_kb)
+    finally:
+        if isinstance(content, mmap.mmap):
+            content.close()
 
-    final_chunks = merge_small_chunks(initial_chunks, min_size_kb=min_size_kb, max_size_kb=max_size_kb)
     save_chunks(final_chunks, output_dir, base_name)
+    _save_split_cache(output_dir, cache_key, final_chunks)
 
     return output_dir
 
 
+def split_markdown_documents(
+    file_paths: List[str],
+    max_size_kb: float = DEFAULT_MAX_CHUNK_KB,
+    min_size_kb: float = DEFAULT_MIN_CHUNK_KB,
+    max_header_level: int = DEFAULT_MAX_HEADER_LEVEL,
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """
+    多进程并行切分多个 Markdown 文档（各文件相互独立）。
+
+    参数:
+        file_paths: 源文件路径列表
+        max_workers: 进程数（默认 CPU 核数），其余参数同 split_markdown_document
+    返回:
+        与 file_paths 顺序一致的输出目录列表
+    """
+    _validate_params(max_size_kb=max_size_kb, min_size_kb=min_size_kb, max_header_level=max_header_level)
+
+    # 输出目录相同的路径（重复路径、同名不同扩展名）归为一组并在同一任务内顺序处理，
+    # 避免多个进程同时清理、写入同一目录；重复路径只处理一次
+    groups: Dict[str, List[str]] = {}
+    for path in file_paths:
+        group = groups.setdefault(os.path.abspath(_output_dir_for(path)), [])
+        if not any(os.path.abspath(path) == os.path.abspath(other) for other in group):
+            group.append(path)
+
+    split_group = partial(
+        _split_markdown_group,
+        max_size_kb=max_size_kb,
+        min_size_kb=min_size_kb,
+        max_header_level=max_header_level,
+    )
+    if len(groups) <= 1:
+        for paths in groups.values():
+            split_group(paths)
+    else:
+        # 进程数不超过任务组数，避免少量文件时启动大量空闲进程
+        workers = min(max_workers or os.cpu_count() or 1, len(groups))
+        # 任务较少时减小批量，避免任务集中到少数进程
+        chunksize = max(1, min(8, len(groups) // workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(split_group, groups.values(), chunksize=chunksize))
+
+    return [_output_dir_for(path) for path in file_paths]
+
+
+def _split_markdown_group(
+    file_paths: List[str],
+    max_size_kb: float,
+    min_size_kb: float,
+    max_header_level: int,
+) -> None:
+    """顺序切分一组共享输出目录的文件（供进程池调用）。"""
+    for path in file_paths:
+        split_markdown_document(
+            path,
+            max_size_kb=max_size_kb,
+            min_size_kb=min_size_kb,
+            max_header_level=max_header_level,
+        )
+
+
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='Split markdown by heading levels and chunk size.')
-    parser.add_argument('file_path', help='Markdown 文件路径')
+    parser.add_argument('file_paths', nargs='+', help='Markdown 文件路径（可多个，并行处理）')
     parser.add_argument('--max-size-kb', type=float, default=DEFAULT_MAX_CHUNK_KB, help='最大分块大小（KB）')
     parser.add_argument('--min-size-kb', type=float, default=DEFAULT_MIN_CHUNK_KB, help='最小分块大小（KB）')
     parser.add_argument('--max-header-level', type=int, default=DEFAULT_MAX_HEADER_LEVEL, help='最大标题层级（1-6）')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认 CPU 核数）')
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = _parse_args()
-    split_markdown_document(
-        file_path=args.file_path,
+    split_markdown_documents(
+        file_paths=args.file_paths,
         max_size_kb=args.max_size_kb,
         min_size_kb=args.min_size_kb,
         max_header_level=args.max_header_level,
+        max_workers=args.workers,
     )